@@ -1,59 +1,65 @@
 # api/custom_field_changed.py
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
-from automations.custom_field_changed import handle_custom_field_change
+from fastapi import APIRouter, Request, Response
+from core.orjson_response import ORJSONResponse
 
-import os
-import json
-from datetime import datetime
+import orjson
+import re
+import time
 from typing import Dict, Any
 
+from core.config import WEBHOOK_DUMP_RAW
+from core.logdir import LOG_DIR
+from core.payload_log import payload_log, save_record_async
 from core.queue import queue
 
 router = APIRouter()
-LOG_DIR = "webhook_logs"
-os.makedirs(LOG_DIR, exist_ok=True)
 
-def _save_json(path: str, data: Dict[str, Any]):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+# Pre-rendered bodies for the hot response paths; %b slots take orjson-encoded values
+_RECEIVED = b'{"status":"received"}'
+_SKIPPED_NO_TASK_ID = b'{"status":"skipped","reason":"missing task id"}'
+_SCHEDULED = b'{"status":"scheduled","task_id":%b,"timestamp":"%d"}'
+
+# A history item with "field": "custom_field", matched on the raw body (whitespace-tolerant)
+_CUSTOM_FIELD_HISTORY_ITEM = re.compile(rb'"field"\s*:\s*"custom_field"')
 
 @router.post("/webhook/custom-field-changed")
 async def custom_field_changed_webhook(request: Request):
     raw: Dict[str, Any] = {}
+    timestamp = time.time_ns()
     try:
-        raw = await request.json()
+        body = await request.body()
+        # Decided on the raw bytes: a body without a custom_field history item is never acted on,
+        # so skip parsing it (raw dumps, when enabled, still want every payload)
+        is_custom_field_change = _CUSTOM_FIELD_HISTORY_ITEM.search(body) is not None
+        if not is_custom_field_change and not WEBHOOK_DUMP_RAW:
+            return Response(_RECEIVED, media_type="application/json")
+        raw = orjson.loads(body)
 
         # Save full payload
-        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
-        filename = f"{LOG_DIR}/custom_field_raw_{timestamp}.json"
-        _save_json(filename, raw)
+        if WEBHOOK_DUMP_RAW:
+            await payload_log.put("custom_field_changed", raw, ts=timestamp)
 
         event = raw.get("event")
         task = raw.get("task", {}) or {}
         history_items = raw.get("history_items", []) or []
 
         # Proceed only if event is taskUpdated AND at least one custom field was updated
-        is_custom_field_change = any(item.get("field") == "custom_field" for item in history_items)
-
         if event == "taskUpdated" and is_custom_field_change:
             task_id = str(task.get("id") or "")
             if not task_id:
-                return JSONResponse(content={"status": "skipped", "reason": "missing task id"}, status_code=200)
+                return Response(_SKIPPED_NO_TASK_ID, media_type="application/json")
 
             async def job():
+                from automations.custom_field_changed import handle_custom_field_change
                 await handle_custom_field_change(task, history_items)
 
             await queue.enqueue(key=task_id, job_factory=job)
 
-            return JSONResponse(
-                content={"status": "scheduled", "task_id": task_id, "timestamp": timestamp},
-                status_code=200
-            )
+            return Response(_SCHEDULED % (orjson.dumps(task_id), timestamp), media_type="application/json")
 
-        return JSONResponse(content={"status": "received"}, status_code=200)
+        return Response(_RECEIVED, media_type="application/json")
 
     except Exception as e:
-        error_filename = f"{LOG_DIR}/error_customfield_{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}.json"
-        _save_json(error_filename, {"error": str(e), "payload": raw})
-        return JSONResponse(content={"error": str(e)}, status_code=500)
\ No newline at end of file
+        error_filename = LOG_DIR / f"error_customfield_{timestamp}.msgpack"
+        await save_record_async(error_filename, {"error": str(e), "payload": raw})
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
\ No newline at end of file
@@ -1,34 +1,41 @@
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import PlainTextResponse, JSONResponse
 import os
-from typing import List, Dict
+from collections import deque
+from typing import Any, Deque, List, Dict, Tuple
 from pathlib import Path
-import time
+import struct
+
+import msgspec
+import orjson
+
+from core.logdir import LOG_DIR
 
 router = APIRouter()
 
-LOG_DIR = Path("webhook_logs")
-LOG_DIR.mkdir(exist_ok=True)
+_decoder = msgspec.msgpack.Decoder()
 
 def _safe_path(name: str) -> Path:
     # Only allow files directly under LOG_DIR
     p = (LOG_DIR / name).resolve()
-    if p.parent != LOG_DIR.resolve():
+    if p.parent != LOG_DIR:
         raise HTTPException(status_code=400, detail="Invalid log file path")
     return p
 
 @router.get("/logs")
 def list_logs() -> List[Dict]:
     files = []
-    for entry in LOG_DIR.iterdir():
-        if entry.is_file() and (entry.suffix in (".log", ".json")):
-            stat = entry.stat()
-            files.append({
-                "name": entry.name,
-                "size": stat.st_size,
-                "modified": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(stat.st_mtime)),
-                "type": entry.suffix.lstrip(".")
-            })
+    # scandir yields entries from a single directory read; is_file() uses the cached d_type
+    with os.scandir(LOG_DIR) as it:
+        for entry in it:
+            if entry.name.endswith((".log", ".json", ".msgpack")) and entry.is_file(follow_symlinks=False):
+                stat = entry.stat(follow_symlinks=False)
+                files.append({
+                    "name": entry.name,
+                    "size": stat.st_size,
+                    "modified": stat.st_mtime,  # epoch seconds; formatting is left to the client
+                    "type": entry.name.rsplit(".", 1)[1]
+                })
     # Sort by modified desc
     files.sort(key=lambda f: f["modified"], reverse=True)
     return files
@@ -41,18 +48,58 @@ def get_log(
     p = _safe_path(name)
     if not p.exists() or not p.is_file():
         raise HTTPException(status_code=404, detail="Log file not found")
+    if p.suffix == ".msgpack":
+        # Render the last N records as one JSON document per line
+        lines = [orjson.dumps(r).decode() + "\n" for r in _read_records(p, tail)]
+        return PlainTextResponse("".join(lines))
     # Read last N lines efficiently
     lines = _tail_lines(p, tail)
     return PlainTextResponse("".join(lines))
 
-def _tail_lines(path: Path, n: int) -> List[str]:
-    # Efficiently read last n lines without loading entire file
-    avg_line_length = 150
-    to_read = n * avg_line_length
-    size = path.stat().st_size
+def _tail_lines(path: Path, n: int, block_size: int = 65536) -> List[str]:
+    # Read fixed-size blocks backwards from EOF until n + 1 newlines are seen
+    # (the extra one marks where the first wanted line starts), then decode only that slice
+    chunks: List[bytes] = []
+    newlines = 0
+    with path.open("rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        while pos > 0 and newlines <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    data = b"".join(reversed(chunks))
+    # A trailing newline terminates the last line rather than starting a new one
+    end = len(data) - 1 if data.endswith(b"\n") else len(data)
+    start = 0
+    for _ in range(n):
+        start = data.rfind(b"\n", 0, end)
+        if start == -1:
+            start = 0
+            break
+        end = start
+        start += 1
+    return data[start:].decode(errors="replace").splitlines(keepends=True)
+
+def _read_records(path: Path, n: int) -> List[Any]:
+    # Files are a sequence of 4-byte big-endian length prefixed MessagePack frames (see core.payload_log).
+    # Hop from prefix to prefix with seek, keeping only the last n frame positions, then read
+    # and decode just those frames; the rest of the file is never loaded.
+    spans: Deque[Tuple[int, int]] = deque(maxlen=n)
     with path.open("rb") as f:
-        if to_read < size:
-            f.seek(size - to_read)
-        data = f.read().decode(errors="replace")
-    lines = data.splitlines(keepends=True)
-    return lines[-n:]
\ No newline at end of file
+        file_size = f.seek(0, os.SEEK_END)
+        pos = 0
+        while pos + 4 <= file_size:
+            f.seek(pos)
+            (size,) = struct.unpack(">I", f.read(4))
+            if pos + 4 + size > file_size:
+                break  # trailing frame still being written
+            spans.append((pos + 4, size))
+            pos += 4 + size
+        records = []
+        for start, size in spans:
+            f.seek(start)
+            records.append(_decoder.decode(f.read(size)))
+    return records
@@ -1,33 +1,35 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
-from automations.status_changed import handle_status_change
+from fastapi import APIRouter, Request, Response
+from core.orjson_response import ORJSONResponse
 import logging
-import os
-import json
-from datetime import datetime
+import orjson
+import time
 from typing import Dict, Any, Optional
 
+from core.config import WEBHOOK_DUMP_RAW
+from core.logdir import LOG_DIR
+from core.logging_setup import attach_file_handler
+from core.payload_log import payload_log, save_record_async
 from core.queue import queue
 
 router = APIRouter()
 
-LOG_DIR = "webhook_logs"
-os.makedirs(LOG_DIR, exist_ok=True)
+# Same file as the status automation, where these lines went when root logging was configured
+logger = attach_file_handler(logging.getLogger(__name__), LOG_DIR / "status_update.log", '[%(asctime)s] %(message)s')
 
-def _save_json(path: str, data: Dict[str, Any]):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+# Pre-rendered bodies for the hot response paths; %b slots take orjson-encoded values
+_SKIPPED = b'{"status":"skipped"}'
+_SCHEDULED = b'{"status":"scheduled","task_id":%b,"new_status":%b,"timestamp":"%d"}'
 
 @router.post("/webhook/status-change")
 async def status_change_webhook(request: Request):
     raw_body: Dict[str, Any] = {}
+    timestamp = time.time_ns()
     try:
-        raw_body = await request.json()
+        raw_body = orjson.loads(await request.body())
 
         # Save full raw payload
-        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
-        filename = f"{LOG_DIR}/status_change_{timestamp}.json"
-        _save_json(filename, raw_body)
+        if WEBHOOK_DUMP_RAW:
+            await payload_log.put("status_change", raw_body, ts=timestamp)
 
         # Extract nested payload (ClickUp webhook style)
         payload = raw_body.get("payload", {}) or {}
@@ -35,20 +37,21 @@ async def status_change_webhook(request: Request):
         status = payload.get("status", {}).get("status")
 
         if not task_id or not status:
-            logging.warning("⚠️ Missing task_id or status in webhook.")
-            return JSONResponse(content={"status": "skipped"}, status_code=200)
+            logger.warning("⚠️ Missing task_id or status in webhook.")
+            return Response(_SKIPPED, media_type="application/json")
 
-        logging.info(f"🚨 Status Change Detected: Task {task_id} ➡ {status}")
+        logger.info(f"🚨 Status Change Detected: Task {task_id} ➡ {status}")
 
         async def job():
+            from automations.status_changed import handle_status_change
             await handle_status_change(payload, history_items=[])
 
         await queue.enqueue(key=str(task_id), job_factory=job)
 
-        return JSONResponse(content={"status": "scheduled", "task_id": task_id, "new_status": status, "timestamp": timestamp}, status_code=200)
+        return Response(_SCHEDULED % (orjson.dumps(task_id), orjson.dumps(status), timestamp), media_type="application/json")
 
     except Exception as e:
-        error_filename = f"{LOG_DIR}/error_{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}.json"
-        _save_json(error_filename, {"error": str(e), "payload": raw_body})
-        logging.error(f"❌ Error: {str(e)}")
-        return JSONResponse(content={"error": str(e)}, status_code=500)
\ No newline at end of file
+        error_filename = LOG_DIR / f"error_{timestamp}.msgpack"
+        await save_record_async(error_filename, {"error": str(e), "payload": raw_body})
+        logger.error(f"❌ Error: {str(e)}")
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
\ No newline at end of file
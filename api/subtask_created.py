@@ -1,47 +1,31 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
-from automations.subtask_created import handle_subtask_creation
-import logging
-import os
-import json
-from datetime import datetime
+from fastapi import APIRouter, Request, Response
+from core.orjson_response import ORJSONResponse
+import orjson
+import time
 from typing import Dict, Any, Optional
 
+from core.config import WEBHOOK_DUMP_RAW
+from core.logdir import LOG_DIR
+from core.logging_setup import webhook_logger
+from core.payload_log import payload_log, save_record_async
 from core.queue import queue
 
 router = APIRouter()
 
-LOG_DIR = "webhook_logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-
-def setup_logger():
-    logger = logging.getLogger("webhook")
-    logger.setLevel(logging.INFO)
-    if not any(getattr(h, "baseFilename", "").endswith("webhook_requests.log") for h in logger.handlers if hasattr(h, "baseFilename")):
-        handler = logging.FileHandler(f"{LOG_DIR}/webhook_requests.log")
-        handler.setFormatter(logging.Formatter(
-            '[%(asctime)s] %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        ))
-        logger.addHandler(handler)
-    return logger
-
-webhook_logger = setup_logger()
-
-def _save_json(path: str, data: Dict[str, Any]):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+# Pre-rendered body for the hot response path; %b slots take orjson-encoded values
+_SCHEDULED = b'{"status":"scheduled","subtask_id":%b,"parent_task_id":%b,"timestamp":"%d"}'
 
 @router.post("/webhook/subtask-created")
 async def subtask_created_webhook(request: Request):
     raw_body: Dict[str, Any] = {}
+    timestamp = time.time_ns()
     try:
         # Parse and log incoming request
-        raw_body = await request.json()
-        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        raw_body = orjson.loads(await request.body())
         
         # Save raw payload for debugging
-        _save_json(f"{LOG_DIR}/subtask_created_{timestamp}.json", raw_body)
+        if WEBHOOK_DUMP_RAW:
+            await payload_log.put("subtask_created", raw_body, ts=timestamp)
         
         # Extract required data
         payload = raw_body.get("payload", {}) or {}
@@ -51,7 +35,7 @@ async def subtask_created_webhook(request: Request):
         if not subtask_id or not parent_task_id:
             error_msg = "Missing subtask_id or parent_task_id in payload"
             webhook_logger.warning(error_msg)
-            return JSONResponse(
+            return ORJSONResponse(
                 content={
                     "status": "skipped",
                     "reason": error_msg,
@@ -67,46 +51,41 @@ async def subtask_created_webhook(request: Request):
         
         # Enqueue coalesced by parent to avoid duplicate copy attempts
         async def job():
+            from automations.subtask_created import handle_subtask_creation
             await handle_subtask_creation(subtask_id, parent_task_id)
         
         await queue.enqueue(key=str(parent_task_id), job_factory=job)
         
-        return JSONResponse(
-            content={
-                "status": "scheduled",
-                "subtask_id": subtask_id,
-                "parent_task_id": parent_task_id,
-                "timestamp": timestamp
-            },
-            status_code=200
+        return Response(
+            _SCHEDULED % (orjson.dumps(subtask_id), orjson.dumps(parent_task_id), timestamp),
+            media_type="application/json"
         )
         
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         error_msg = "Invalid JSON payload"
         webhook_logger.error(error_msg)
-        return JSONResponse(
+        return ORJSONResponse(
             content={"status": "error", "message": error_msg},
             status_code=400
         )
         
     except Exception as e:
         error_msg = str(e)
-        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
         
         webhook_logger.error(f"Webhook error: {error_msg}")
         
         # Save error details
-        _save_json(f"{LOG_DIR}/error_{timestamp}.json", {
+        await save_record_async(LOG_DIR / f"error_{timestamp}.msgpack", {
             "error": error_msg,
             "payload": raw_body,
             "timestamp": timestamp
         })
         
-        return JSONResponse(
+        return ORJSONResponse(
             content={
                 "status": "error",
                 "message": error_msg,
-                "timestamp": timestamp
+                "timestamp": str(timestamp)
             },
             status_code=500
         )
\ No newline at end of file
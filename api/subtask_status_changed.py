@@ -1,43 +1,26 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
-from automations.subtask_status_changed import handle_subtask_status_changed
-import logging
-import os
-import json
-from datetime import datetime
+from fastapi import APIRouter, Request, Response
+from core.orjson_response import ORJSONResponse
+import orjson
+import time
 from typing import Any, Dict, Optional
-from core.config import CLICKUP_TEAM_ID
+from core.config import CLICKUP_TEAM_ID, WEBHOOK_DUMP_RAW
+from core.logdir import LOG_DIR
+from core.logging_setup import webhook_logger
+from core.payload_log import payload_log, save_record_async
 from core.queue import queue
 
 router = APIRouter()
 
-LOG_DIR = "webhook_logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-
-def setup_logger():
-    logger = logging.getLogger("webhook_subtask_status_changed")
-    logger.setLevel(logging.INFO)
-    if not any(getattr(h, "baseFilename", "").endswith("webhook_requests.log") for h in logger.handlers if hasattr(h, "baseFilename")):
-        handler = logging.FileHandler(f"{LOG_DIR}/webhook_requests.log")
-        handler.setFormatter(logging.Formatter(
-            '[%(asctime)s] %(levelname)s - %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        ))
-        logger.addHandler(handler)
-    return logger
-
-webhook_logger = setup_logger()
-
-def save_json(path: str, data: Dict[str, Any]):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+# Pre-rendered body for the hot response path; %b slots take orjson-encoded values
+_SCHEDULED = b'{"status":"scheduled","subtask_id":%b,"parent_task_id":%b,"timestamp":"%d"}'
 
 async def _schedule(request: Request):
     raw_body: Dict[str, Any] = {}
+    timestamp = time.time_ns()
     try:
-        raw_body = await request.json()
-        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
-        save_json(f"{LOG_DIR}/subtask_status_changed_{timestamp}.json", raw_body)
+        raw_body = orjson.loads(await request.body())
+        if WEBHOOK_DUMP_RAW:
+            await payload_log.put("subtask_status_changed", raw_body, ts=timestamp)
 
         payload = raw_body.get("payload", {})
         subtask_id: Optional[str] = payload.get("id")
@@ -47,7 +30,7 @@ async def _schedule(request: Request):
         if not subtask_id or not parent_task_id:
             msg = "Missing subtask_id or parent_task_id in payload"
             webhook_logger.warning(msg)
-            return JSONResponse(
+            return ORJSONResponse(
                 content={"status": "skipped", "reason": msg, "received_data": {"subtask_id": subtask_id, "parent_task_id": parent_task_id}},
                 status_code=200
             )
@@ -56,25 +39,25 @@ async def _schedule(request: Request):
 
         # Enqueue a coalesced job keyed by parent_task_id
         async def job():
+            from automations.subtask_status_changed import handle_subtask_status_changed
             await handle_subtask_status_changed(subtask_id=subtask_id, parent_task_id=parent_task_id, team_id=team_id)
 
         await queue.enqueue(key=parent_task_id, job_factory=job)
 
-        return JSONResponse(
-            content={"status": "scheduled", "subtask_id": subtask_id, "parent_task_id": parent_task_id, "timestamp": timestamp},
-            status_code=200
+        return Response(
+            _SCHEDULED % (orjson.dumps(subtask_id), orjson.dumps(parent_task_id), timestamp),
+            media_type="application/json"
         )
 
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         error_msg = "Invalid JSON payload"
         webhook_logger.error(error_msg)
-        return JSONResponse(content={"status": "error", "message": error_msg}, status_code=400)
+        return ORJSONResponse(content={"status": "error", "message": error_msg}, status_code=400)
     except Exception as e:
         error_msg = str(e)
-        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
         webhook_logger.error(f"Webhook error: {error_msg}")
-        save_json(f"{LOG_DIR}/error_subtask_status_changed_{timestamp}.json", {"error": error_msg, "payload": raw_body, "timestamp": timestamp})
-        return JSONResponse(content={"status": "error", "message": error_msg, "timestamp": timestamp}, status_code=500)
+        await save_record_async(LOG_DIR / f"error_subtask_status_changed_{timestamp}.msgpack", {"error": error_msg, "payload": raw_body, "timestamp": timestamp})
+        return ORJSONResponse(content={"status": "error", "message": error_msg, "timestamp": str(timestamp)}, status_code=500)
 
 @router.post("/webhook/subtask-status-changed")
 async def subtask_status_changed_webhook(request: Request):
@@ -1,32 +1,37 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
-from automations.task_created import handle_task_created
+from fastapi import APIRouter, Request, Response
+from core.orjson_response import ORJSONResponse
 
-import os
-import json
-from datetime import datetime
+import orjson
+import time
 from typing import Dict, Any, Optional
 
+from core.config import WEBHOOK_DUMP_RAW
+from core.logdir import LOG_DIR
+from core.payload_log import payload_log, save_record_async
 from core.queue import queue
 
 router = APIRouter()
 
-LOG_DIR = "webhook_logs"
-os.makedirs(LOG_DIR, exist_ok=True)
-
-def _save_json(path: str, data: Dict[str, Any]):
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+# Pre-rendered bodies for the hot response paths; %b slots take orjson-encoded values.
+# The ns timestamp is quoted: it exceeds 2**53, and JSON clients parsing it as a double would round it
+_RECEIVED = b'{"status":"received"}'
+_SKIPPED_NO_TASK_ID = b'{"status":"skipped","reason":"missing task id"}'
+_SCHEDULED = b'{"status":"scheduled","task_id":%b,"timestamp":"%d"}'
 
 @router.post("/webhook/task-created")
 async def task_created_webhook(request: Request):
     raw: Dict[str, Any] = {}
+    timestamp = time.time_ns()
     try:
-        raw = await request.json()
+        body = await request.body()
+        # Byte-level pre-filter: only taskCreated events are acted on, so skip parsing anything else
+        # (raw dumps, when enabled, still want every payload)
+        if b'"taskCreated"' not in body and not WEBHOOK_DUMP_RAW:
+            return Response(_RECEIVED, media_type="application/json")
+        raw = orjson.loads(body)
 
-        timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
-        filename = f"{LOG_DIR}/task_created_{timestamp}.json"
-        _save_json(filename, raw)
+        if WEBHOOK_DUMP_RAW:
+            await payload_log.put("task_created", raw, ts=timestamp)
 
         event: Optional[str] = raw.get("event")
         task: Dict[str, Any] = raw.get("task", {}) or {}
@@ -35,18 +40,19 @@ async def task_created_webhook(request: Request):
         if event == "taskCreated" and not task.get("parent"):
             task_id = str(task.get("id") or "")
             if not task_id:
-                return JSONResponse(content={"status": "skipped", "reason": "missing task id"}, status_code=200)
+                return Response(_SKIPPED_NO_TASK_ID, media_type="application/json")
 
             async def job():
+                from automations.task_created import handle_task_created
                 await handle_task_created(task)
 
             await queue.enqueue(key=task_id, job_factory=job)
 
-            return JSONResponse(content={"status": "scheduled", "task_id": task_id, "timestamp": timestamp}, status_code=200)
+            return Response(_SCHEDULED % (orjson.dumps(task_id), timestamp), media_type="application/json")
 
-        return JSONResponse(content={"status": "received"}, status_code=200)
+        return Response(_RECEIVED, media_type="application/json")
 
     except Exception as e:
-        error_filename = f"{LOG_DIR}/error_{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}.json"
-        _save_json(error_filename, {"error": str(e), "payload": raw})
-        return JSONResponse(content={"error": str(e)}, status_code=500)
\ No newline at end of file
+        error_filename = LOG_DIR / f"error_{timestamp}.msgpack"
+        await save_record_async(error_filename, {"error": str(e), "payload": raw})
+        return ORJSONResponse(content={"error": str(e)}, status_code=500)
\ No newline at end of file
@@ -1,13 +1,12 @@
 # automations/custom_field_changed.py
-import json
-from datetime import datetime
-from pathlib import Path
+import orjson
+import time
 
-LOG_DIR = Path("webhook_logs")
-LOG_DIR.mkdir(parents=True, exist_ok=True)
+from core.logdir import LOG_DIR
+from core.payload_log import write_bytes
 
 async def handle_custom_field_change(task: dict, history_items: list):
-    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    timestamp = time.time_ns()
     log_file = LOG_DIR / f"custom_field_change_{timestamp}.json"
 
     data = {
@@ -16,5 +15,4 @@ async def handle_custom_field_change(task: dict, history_items: list):
         "history_items": history_items
     }
 
-    with open(log_file, "w") as f:
-        json.dump(data, f, indent=4)
+    write_bytes(log_file, orjson.dumps(data))
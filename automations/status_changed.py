@@ -1,24 +1,21 @@
 # automations/status_changed.py
+from core.config import LOG_TO_STDOUT
+from core.logdir import LOG_DIR
+from core.logging_setup import attach_file_handler
 from services.clickup import get_subtasks_from_task_details, update_task_status
 from datetime import datetime
 import asyncio
-import os
 import logging
+import sys
 
-LOG_FILE = "webhook_logs/status_update.log"
-os.makedirs("webhook_logs", exist_ok=True)
+LOG_FILE = LOG_DIR / "status_update.log"
 
-logger = logging.getLogger(__name__)
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format='[%(asctime)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+logger = attach_file_handler(logging.getLogger(__name__), LOG_FILE, '[%(asctime)s] %(message)s')
+if LOG_TO_STDOUT:
+    logger.addHandler(logging.StreamHandler(sys.stdout))
 
 def log(msg: str):
     logger.info(msg)
-    print(msg)
 
 async def handle_status_change(task: dict, history_items: list):
     try:
@@ -48,11 +45,14 @@ async def handle_status_change(task: dict, history_items: list):
             log(f"\u27A1\uFE0F Updating subtask {subtask_id} to '{new_status}'")
             update_tasks.append(update_task_status(subtask_id, new_status))
 
-        results = await asyncio.gather(*update_tasks)
+        # return_exceptions: one failed request must not abort reporting on the rest
+        results = await asyncio.gather(*update_tasks, return_exceptions=True)
 
         for i, result in enumerate(results):
             sub_id = subtasks[i].get("id")
-            if result:
+            if isinstance(result, Exception):
+                log(f"\u274C Subtask {sub_id} update raised: {str(result)}")
+            elif result:
                 log(f"\u2705 Subtask {sub_id} updated successfully.")
             else:
                 log(f"\u274C Subtask {sub_id} update failed.")
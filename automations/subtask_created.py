@@ -1,24 +1,21 @@
 import logging
-import os
 import asyncio
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from cachetools import TTLCache
+from core.logdir import LOG_DIR
+from core.logging_setup import attach_file_handler
 from services.field_update import (
     get_task_details,
+    option_indexes,
     update_task_fields,
     verify_field_updates,
     log_current_field_states
 )
 
-LOG_FILE = "webhook_logs/subtask_automation.log"
-os.makedirs("webhook_logs", exist_ok=True)
+LOG_FILE = LOG_DIR / "subtask_automation.log"
 
-logger = logging.getLogger(__name__)
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO, # Keep INFO level for file logging of key events
-    format='[%(asctime)s] %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Keep INFO level for file logging of key events
+logger = attach_file_handler(logging.getLogger(__name__), LOG_FILE, '[%(asctime)s] %(levelname)s - %(message)s')
 
 def log(msg: str, level: str = "info"):
     # Removed print statements for cleaner console output
@@ -33,6 +30,50 @@ FIELD_MAPPING = {
     "1bab94c1-eeff-455c-adfe-20e6079b275d": "Machine Brand"
 }
 
+# In-flight/recent parent fetches keyed by (parent_task_id, team_id). A burst of subtask
+# webhooks for one parent shares a single GET instead of issuing one each.
+_parent_fetches: "TTLCache[Tuple[str, str], asyncio.Future]" = TTLCache(maxsize=1024, ttl=5)
+
+async def get_parent_task(parent_task_id: str, team_id: str) -> Optional[Dict]:
+    """Fetch parent task details, reusing a fetch started within the last few seconds."""
+    key = (parent_task_id, team_id)
+    # No await between the lookup and the insert, so concurrent callers cannot both miss
+    fetch = _parent_fetches.get(key)
+    if fetch is None:
+        fetch = asyncio.ensure_future(get_task_details(parent_task_id, team_id))
+        _parent_fetches[key] = fetch
+    # shield: one caller being cancelled must not cancel the fetch the others are awaiting
+    parent_task = await asyncio.shield(fetch)
+    if not parent_task and _parent_fetches.get(key) is fetch:
+        # Don't hold on to a failed fetch; the next webhook should try again
+        _parent_fetches.pop(key, None)
+    return parent_task
+
+# Dropdown option resolvers, dispatched on the type of the parent field's value.
+# Lookups go through option_indexes, which builds them once per field_id and option
+# schema and shares them with verification.
+def _by_orderindex(value: int, field_id: str, options: List[Dict]) -> Any:
+    # Value is an orderindex
+    return option_indexes(field_id, options)["by_order"].get(value)
+
+def _by_dict_id(value: Dict, field_id: str, options: List[Dict]) -> Any:
+    # Value is a dict with 'id'
+    return value.get("id")
+
+def _by_id_or_name(value: str, field_id: str, options: List[Dict]) -> Any:
+    # Value is a string (could be name or ID): try ID first, then name
+    indexes = option_indexes(field_id, options)
+    return indexes["by_id"].get(value) or indexes["by_name"].get(value)
+
+def _unresolved(value: Any, field_id: str, options: List[Dict]) -> Any:
+    return None
+
+_DROPDOWN_RESOLVERS = {
+    int: _by_orderindex,
+    dict: _by_dict_id,
+    str: _by_id_or_name,
+}
+
 def prepare_fields_for_update(parent_fields: List[Dict]) -> List[Dict]:
     """Enhanced field preparation with dynamic dropdown option resolution."""
     fields_to_update = []
@@ -60,33 +101,9 @@ def prepare_fields_for_update(parent_fields: List[Dict]) -> List[Dict]:
         if field_type == "drop_down":
             # Get the options directly from the parent field's type_config
             options_from_parent_field = field.get("type_config", {}).get("options", [])
-            
-            target_option_id = None
-            
+
             # Determine the selected option's ID from the parent task's value
-            if isinstance(value, int): # Value is an orderindex
-                for opt in options_from_parent_field:
-                    if opt.get("orderindex") == value:
-                        target_option_id = opt.get("id")
-                        # Removed verbose debug logging for resolved dropdowns
-                        # log(f"Resolved dropdown '{field_name}' by orderindex {value} to ID: {target_option_id}", "debug")
-                        break
-            elif isinstance(value, dict) and "id" in value: # Value is a dict with 'id'
-                target_option_id = value["id"]
-                # Removed verbose debug logging for resolved dropdowns
-                # log(f"Resolved dropdown '{field_name}' by direct ID in dict: {target_option_id}", "debug")
-            elif isinstance(value, str): # Value is a string (could be name or ID)
-                # Try to match by ID first
-                for opt in options_from_parent_field:
-                    if str(opt.get("id")) == value:
-                        target_option_id = opt.get("id")
-                        break
-                # If not found by ID, try to match by name
-                if not target_option_id:
-                    for opt in options_from_parent_field:
-                        if opt.get("name") == value:
-                            target_option_id = opt.get("id")
-                            break
+            target_option_id = _DROPDOWN_RESOLVERS.get(type(value), _unresolved)(value, field_id, options_from_parent_field)
             
             if not target_option_id:
                 log(f"Could not resolve target option ID for dropdown '{field_name}' ({field_id}) from value: {value}. This option might not exist or value format is unexpected.", "warning")
@@ -110,7 +127,7 @@ async def handle_subtask_creation(subtask_id: str, parent_task_id: str, team_id:
     try:
         log(f"Starting field copy from parent {parent_task_id} to subtask {subtask_id}", "info")
         
-        parent_task = await get_task_details(parent_task_id, team_id)
+        parent_task = await get_parent_task(parent_task_id, team_id)
         if not parent_task:
             log(f"Parent task {parent_task_id} not found or could not be fetched.", "error")
             return False
@@ -125,10 +142,14 @@ async def handle_subtask_creation(subtask_id: str, parent_task_id: str, team_id:
         
         log(f"Prepared {len(fields_to_update)} fields for update on subtask {subtask_id}: {fields_to_update}", "info")
         
-        await log_current_field_states(subtask_id, [f["id"] for f in fields_to_update], team_id)
+        # The pre-update state dump is a read independent of the writes, so overlap it with them
+        field_states_logged = asyncio.create_task(
+            log_current_field_states(subtask_id, [f["id"] for f in fields_to_update], team_id)
+        )
 
         # Initial update attempt
         update_success = await update_task_fields(subtask_id, fields_to_update, team_id)
+        await field_states_logged
         
         if not update_success:
             log(f"Initial attempt: Failed to update some fields for subtask {subtask_id}.", "warning")
@@ -1,9 +1,10 @@
 import logging
-import os
 import asyncio
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import re
 from typing import List, Dict, Any, Optional, Tuple
 
+from core.logdir import LOG_DIR
+from core.logging_setup import attach_file_handler
 from services.clickup import get_subtasks_from_task_details
 from services.field_update import (
     get_task_details,
@@ -11,18 +12,9 @@ from services.field_update import (
     verify_field_updates,
 )
 
-LOG_FILE = "webhook_logs/subtask_status_sum.log"
-os.makedirs("webhook_logs", exist_ok=True)
+LOG_FILE = LOG_DIR / "subtask_status_sum.log"
 
-logger = logging.getLogger(__name__)
-if not logger.handlers:
-    handler = logging.FileHandler(LOG_FILE)
-    formatter = logging.Formatter(
-        "[%(asctime)s] %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
-    )
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-logger.setLevel(logging.INFO)
+logger = attach_file_handler(logging.getLogger(__name__), LOG_FILE, "[%(asctime)s] %(levelname)s - %(message)s")
 
 def log(msg: str, level: str = "info"):
     getattr(logger, level)(msg)
@@ -31,43 +23,126 @@ def log(msg: str, level: str = "info"):
 PARTS_COST_FIELD_ID = "bad587f3-e81b-45dc-9f38-28eed14c9e6e"        # "Parts cost" (currency)
 TOTAL_PARTS_COST_FIELD_ID = "7ba61d6a-6b79-49c3-9e6d-1fd1e30310cc"   # "Total Parts Cost" (currency)
 
-def _safe_decimal(value: Any) -> Decimal:
-    if value is None or value == "":
-        return Decimal("0")
-    try:
-        return Decimal(str(value))
-    except (InvalidOperation, TypeError, ValueError):
-        return Decimal("0")
-
-def _format_currency_str(amount: Decimal) -> str:
-    quantized = amount.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-    return f"{quantized:.2f}"
-
-async def _fetch_subtask_parts_costs(subtask_ids: List[str], team_id: str) -> List[Decimal]:
-    results: List[Decimal] = []
+# Amounts are handled as integer cents, which is exact for 2dp currency.
+# Parsing the string keeps it exact ("0.1" is 10 cents, not float's 0.1000000000000000055...).
+_AMOUNT = re.compile(r"([+-]?)(\d*)(?:\.(\d*))?")
 
+def _safe_cents(value: Any) -> int:
+    if value is None or value == "":
+        return 0
+    text = str(value).strip()
+    match = _AMOUNT.fullmatch(text)
+    if not match or not (match.group(2) or match.group(3)):
+        # Exponent forms and the like; float is close enough for those rare values
+        try:
+            return round(float(text) * 100)
+        except (TypeError, ValueError, OverflowError):
+            return 0
+    sign, whole, frac = match.groups()
+    frac = frac or ""
+    cents = int(whole or 0) * 100 + int((frac + "00")[:2])
+    if frac[2:3] >= "5":
+        cents += 1  # half away from zero, as ROUND_HALF_UP does
+    return -cents if sign == "-" else cents
+
+def _format_currency_str(cents: int) -> str:
+    sign = "-" if cents < 0 else ""
+    cents = abs(cents)
+    return f"{sign}{cents // 100}.{cents % 100:02d}"
+
+def _extract_parts_cost(task: Dict[str, Any]) -> int:
+    for cf in task.get("custom_fields", []):
+        if cf.get("id") == PARTS_COST_FIELD_ID:
+            return _safe_cents(cf.get("value"))
+    return 0
+
+async def _sum_subtask_parts_costs(subtask_ids: List[str], team_id: str) -> int:
+    """Fetch each subtask and add up its Parts cost in cents, as the responses arrive."""
     sem = asyncio.Semaphore(6)  # limit concurrency to avoid rate limits
 
-    async def fetch_and_extract(sub_id: str) -> Decimal:
-        async with sem:
-            data = await get_task_details(sub_id, team_id)
+    async def fetch_and_extract(sub_id: str) -> int:
+        try:
+            async with sem:
+                data = await get_task_details(sub_id, team_id)
+        except Exception as e:
+            log(f"Error fetching subtask {sub_id} parts cost: {str(e)}", "warning")
+            return 0
         if not data:
             log(f"Could not fetch details for subtask {sub_id}", "warning")
-            return Decimal("0")
-        for cf in data.get("custom_fields", []):
-            if cf.get("id") == PARTS_COST_FIELD_ID:
-                return _safe_decimal(cf.get("value"))
-        return Decimal("0")
-
-    fetched = await asyncio.gather(*(fetch_and_extract(sid) for sid in subtask_ids), return_exceptions=True)
-    for idx, item in enumerate(fetched):
-        if isinstance(item, Exception):
-            log(f"Error fetching subtask {subtask_ids[idx]} parts cost: {str(item)}", "warning")
-            results.append(Decimal("0"))
-        else:
-            results.append(item)
-
-    return results
+            return 0
+        return _extract_parts_cost(data)
+
+    total = 0
+    for fetched in asyncio.as_completed([fetch_and_extract(sid) for sid in subtask_ids]):
+        total += await fetched
+    return total
+
+async def _commit_total_parts_cost(parent_task_id: str, total_cost_str: str, team_id: str) -> Tuple[bool, List[Dict]]:
+    """
+    Write the parent's Total Parts Cost and verify it, retrying the write once.
+    Verification (a full task GET) only runs after a write ClickUp accepted.
+    If the first attempt is not confirmed, the retry write and a delayed
+    read-back are issued together rather than one after the other; the
+    read-back is dropped if the retry returns rejected after a rejected first write.
+    """
+    expected_fields = [{
+        "id": TOTAL_PARTS_COST_FIELD_ID,
+        "value": total_cost_str,
+        "name": "Total Parts Cost",
+        "type": "currency"
+    }]
+
+    def write():
+        return update_single_field(
+            task_id=parent_task_id,
+            field_id=TOTAL_PARTS_COST_FIELD_ID,
+            value=total_cost_str,
+            field_type="currency",
+            team_id=team_id
+        )
+
+    def verify():
+        return verify_field_updates(
+            task_id=parent_task_id,
+            expected_fields=expected_fields,
+            team_id=team_id,
+            return_failed=True
+        )
+
+    async def verify_after_delay():
+        await asyncio.sleep(0.8)
+        return await verify()
+
+    first_write_ok = await write()
+    if first_write_ok:
+        verify_ok, _ = await verify()
+        if verify_ok:
+            return True, []
+
+    log("Update or verification failed. Retrying update alongside a delayed verification...", "warning")
+    retry_task = asyncio.create_task(write())
+    verify_task = asyncio.create_task(verify_after_delay())
+    done, _ = await asyncio.wait({retry_task, verify_task}, return_when=asyncio.FIRST_COMPLETED)
+
+    if verify_task in done:
+        verify_ok, failed = verify_task.result()
+        if verify_ok:
+            # The first write has landed after all; the retry would only rewrite the same value
+            retry_task.cancel()
+            return True, []
+        # That read may predate the retry, so read back once more if the retry was accepted
+        if not await retry_task:
+            return False, failed
+        verify_ok, failed = await verify()
+    else:
+        if not retry_task.result() and not first_write_ok:
+            # ClickUp rejected both writes, so there is nothing the read-back could confirm
+            verify_task.cancel()
+            return False, expected_fields
+        # Usual case: the retry returns well within the delay, so the verification reads after it
+        verify_ok, failed = await verify_task
+
+    return (True, []) if verify_ok else (False, failed)
 
 async def handle_subtask_status_changed(subtask_id: str, parent_task_id: str, team_id: str = "20420318") -> Tuple[bool, Dict[str, Any]]:
     """
@@ -87,90 +162,37 @@ async def handle_subtask_status_changed(subtask_id: str, parent_task_id: str, te
 
         # If the parent has no subtasks, set total to 0.00
         if not subtask_ids:
-            total_cost_str = _format_currency_str(Decimal("0"))
-            update_ok = await update_single_field(
-                task_id=parent_task_id,
-                field_id=TOTAL_PARTS_COST_FIELD_ID,
-                value=total_cost_str,
-                field_type="currency",
-                team_id=team_id
-            )
-            verify_ok, _ = await verify_field_updates(
-                task_id=parent_task_id,
-                expected_fields=[{
-                    "id": TOTAL_PARTS_COST_FIELD_ID,
-                    "value": total_cost_str,
-                    "name": "Total Parts Cost",
-                    "type": "currency"
-                }],
-                team_id=team_id
-            )
-            if not update_ok or not verify_ok:
+            total_cost_str = _format_currency_str(0)
+            verify_ok, _ = await _commit_total_parts_cost(parent_task_id, total_cost_str, team_id)
+            if not verify_ok:
                 log(f"Failed to update/verify Total Parts Cost=0.00 on parent {parent_task_id}", "error")
-            return update_ok and verify_ok, {
+            return verify_ok, {
                 "parent_task_id": parent_task_id,
                 "subtask_count": 0,
                 "total_parts_cost": total_cost_str,
-                "verified": update_ok and verify_ok
+                "verified": verify_ok
             }
 
-        # 2) Fetch each subtask and extract Parts cost
-        parts_costs = await _fetch_subtask_parts_costs(subtask_ids, team_id)
-        total = sum(parts_costs, start=Decimal("0"))
+        # 2) Extract Parts cost from the custom_fields embedded in the subtasks array.
+        #    Only subtasks returned without custom_fields fall back to an individual GET.
+        total = sum(_extract_parts_cost(t) for t in subtasks if t.get("id") and "custom_fields" in t)
+        missing_ids = [t.get("id") for t in subtasks if t.get("id") and "custom_fields" not in t]
+        if missing_ids:
+            log(f"{len(missing_ids)} subtasks came back without custom_fields; fetching them individually", "warning")
+            total += await _sum_subtask_parts_costs(missing_ids, team_id)
         total_cost_str = _format_currency_str(total)
-        log(f"Computed Total Parts Cost from {len(parts_costs)} subtasks: {total_cost_str}")
-
-        # 3) Update parent Total Parts Cost
-        update_ok = await update_single_field(
-            task_id=parent_task_id,
-            field_id=TOTAL_PARTS_COST_FIELD_ID,
-            value=total_cost_str,
-            field_type="currency",
-            team_id=team_id
-        )
-
-        # 4) Verify with a small retry if needed
-        verify_ok, failed = await verify_field_updates(
-            task_id=parent_task_id,
-            expected_fields=[{
-                "id": TOTAL_PARTS_COST_FIELD_ID,
-                "value": total_cost_str,
-                "name": "Total Parts Cost",
-                "type": "currency"
-            }],
-            team_id=team_id,
-            return_failed=True
-        )
+        log(f"Computed Total Parts Cost from {len(subtask_ids)} subtasks: {total_cost_str}")
 
+        # 3) + 4) Update parent Total Parts Cost and verify, retrying once if needed
+        verify_ok, failed = await _commit_total_parts_cost(parent_task_id, total_cost_str, team_id)
         if not verify_ok:
-            log("Verification failed. Retrying update once after short delay...", "warning")
-            await asyncio.sleep(0.8)
-            retry_ok = await update_single_field(
-                task_id=parent_task_id,
-                field_id=TOTAL_PARTS_COST_FIELD_ID,
-                value=total_cost_str,
-                field_type="currency",
-                team_id=team_id
-            )
-            verify_ok, failed = await verify_field_updates(
-                task_id=parent_task_id,
-                expected_fields=[{
-                    "id": TOTAL_PARTS_COST_FIELD_ID,
-                    "value": total_cost_str,
-                    "name": "Total Parts Cost",
-                    "type": "currency"
-                }],
-                team_id=team_id,
-                return_failed=True
-            )
-            if not verify_ok:
-                log(f"Final verification failed for parent {parent_task_id} total={total_cost_str}", "error")
-                return False, {
-                    "parent_task_id": parent_task_id,
-                    "total_parts_cost": total_cost_str,
-                    "verified": False,
-                    "failed_fields": [f.get("id") for f in failed]
-                }
+            log(f"Final verification failed for parent {parent_task_id} total={total_cost_str}", "error")
+            return False, {
+                "parent_task_id": parent_task_id,
+                "total_parts_cost": total_cost_str,
+                "verified": False,
+                "failed_fields": [f.get("id") for f in failed]
+            }
 
         log(f"Successfully updated and verified Total Parts Cost on parent {parent_task_id} = {total_cost_str}")
         return True, {
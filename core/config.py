@@ -8,6 +8,10 @@ CLICKUP_API_TOKEN = os.getenv("CLICKUP_API_TOKEN")
 ENV = os.getenv("ENV", "development")
 CLICKUP_TEAM_ID = os.getenv("CLICKUP_TEAM_ID")
 CLICKUP_LIST_ID = os.getenv("CLICKUP_LIST_ID", "")
+# Dump every raw webhook payload to the payload log (error payloads are always kept)
+WEBHOOK_DUMP_RAW = os.getenv("WEBHOOK_DUMP_RAW") == "1"
+# Mirror automation log lines to stdout (local development)
+LOG_TO_STDOUT = os.getenv("LOG_TO_STDOUT") == "1"
 
 if CLICKUP_LIST_ID is None:
     raise ValueError("CLICKUP_LIST_ID is not set in the .env file.")
\ No newline at end of file
@@ -0,0 +1,6 @@
+# core/logdir.py
+from pathlib import Path
+
+# Single home for webhook log artifacts; created by the app's startup hook. Log file
+# handlers open lazily, so nothing is written here before that hook has run.
+LOG_DIR = Path("webhook_logs").resolve()
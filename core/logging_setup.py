@@ -0,0 +1,60 @@
+# core/logging_setup.py
+import atexit
+import logging
+import queue
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from typing import Dict
+
+from core.logdir import LOG_DIR
+
+WEBHOOK_LOG_FILE = LOG_DIR / "webhook_requests.log"
+
+def setup_logger() -> logging.Logger:
+    """
+    Logger shared by all webhook endpoints, writing to webhook_requests.log.
+    Records are buffered in a MemoryHandler and written in batches of 100;
+    ERROR and above flush immediately so failures are never held back.
+    """
+    logger = logging.getLogger("webhook")
+    logger.setLevel(logging.INFO)
+    if not any(isinstance(h, MemoryHandler) for h in logger.handlers):
+        file_handler = logging.FileHandler(WEBHOOK_LOG_FILE, delay=True)
+        file_handler.setFormatter(logging.Formatter(
+            '[%(asctime)s] %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+        logger.addHandler(MemoryHandler(capacity=100, flushLevel=logging.ERROR, target=file_handler))
+    return logger
+
+webhook_logger = setup_logger()
+
+# One queue + listener thread per log file, shared by every logger writing to that file,
+# so two modules logging to the same path never hold competing rotating handlers.
+_file_queues: Dict[Path, QueueHandler] = {}
+
+def _queue_handler(path: Path, fmt: str) -> QueueHandler:
+    handler = _file_queues.get(path)
+    if handler is None:
+        file_handler = RotatingFileHandler(path, maxBytes=50_000_000, backupCount=5, delay=True)
+        file_handler.setFormatter(logging.Formatter(fmt, datefmt='%Y-%m-%d %H:%M:%S'))
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        listener = QueueListener(log_queue, MemoryHandler(capacity=100, flushLevel=logging.ERROR, target=file_handler))
+        listener.start()
+        # Registered after logging's own atexit hook, so it runs first and drains the queue
+        atexit.register(listener.stop)
+        handler = _file_queues[path] = QueueHandler(log_queue)
+    return handler
+
+def attach_file_handler(logger: logging.Logger, path: Path, fmt: str) -> logging.Logger:
+    """
+    Give a module logger its own log file instead of configuring the root logger.
+    Logging calls only enqueue the record; a background QueueListener thread does the
+    file I/O, batching through a MemoryHandler (ERROR and above flush immediately).
+    The file rotates at 50MB keeping 5 backups, and records do not propagate to root.
+    """
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not any(isinstance(h, QueueHandler) for h in logger.handlers):
+        logger.addHandler(_queue_handler(Path(path).resolve(), fmt))
+    return logger
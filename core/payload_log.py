@@ -0,0 +1,150 @@
+# core/payload_log.py
+import asyncio
+import logging
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import msgspec
+
+from core.logdir import LOG_DIR
+from core.logging_setup import attach_file_handler
+
+logger = attach_file_handler(logging.getLogger(__name__), LOG_DIR / "payload_log.log", '[%(asctime)s] %(levelname)s - %(message)s')
+
+# Reused across calls; constructing an Encoder per record is measurable overhead
+_encoder = msgspec.msgpack.Encoder()
+
+def append_frame(buffer: bytearray, record: Any):
+    """Append record to buffer as a 4-byte big-endian length followed by its MessagePack encoding."""
+    start = len(buffer)
+    buffer += b"\0\0\0\0"
+    _encoder.encode_into(record, buffer, start + 4)
+    struct.pack_into(">I", buffer, start, len(buffer) - start - 4)
+
+def _write_all(fd: int, data):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def write_bytes(path: Union[str, Path], data):
+    """One-shot file write via os.open/os.write, skipping the buffered file object open() builds."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _write_all(fd, data)
+    finally:
+        os.close(fd)
+
+def save_record(path: Union[str, Path], data: Dict[str, Any]):
+    buffer = bytearray()
+    append_frame(buffer, data)
+    write_bytes(path, buffer)
+
+async def save_record_async(path: Union[str, Path], data: Dict[str, Any]):
+    """Write the record file from a worker thread so the event loop is not blocked."""
+    await asyncio.to_thread(save_record, path, data)
+
+class PayloadLog:
+    """
+    Batched raw-payload log:
+      - put(name, data): queues a record for the background writer
+      - Records are appended to a rolling file as length-prefixed MessagePack frames
+        (4-byte big-endian length, then the encoded record)
+      - The writer collects records for flush_interval (or until max_batch / buffer_cap)
+        and writes them with a single write() call
+      - close() drains pending records, fsyncs and closes the file; call it on shutdown
+    """
+    def __init__(
+        self,
+        directory: Path = LOG_DIR,
+        flush_interval: float = 0.05,
+        max_batch: int = 256,
+        buffer_cap: int = 128 * 1024,
+        max_file_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.buffer_cap = buffer_cap
+        self.max_file_bytes = max_file_bytes
+        self._queue: "asyncio.Queue[Optional[Tuple[str, int, Any]]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._buffer = bytearray()
+        self._fd: Optional[int] = None
+        self._file_bytes = 0
+
+    async def put(self, name: str, data: Any, ts: Optional[int] = None) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        await self._queue.put((name, ts if ts is not None else time.time_ns(), data))
+
+    async def close(self) -> None:
+        if self._task is None:
+            return
+        # None is the shutdown sentinel: the writer flushes what it has and exits
+        await self._queue.put(None)
+        try:
+            await self._task
+        except Exception:
+            # A failed writer must not hold up the rest of shutdown
+            logger.exception("Payload log writer failed")
+        finally:
+            self._task = None
+
+    def _encode(self, item: Tuple[str, int, Any]):
+        name, ts, data = item
+        append_frame(self._buffer, {"name": name, "ts": ts, "payload": data})
+
+    async def _run(self):
+        stop = False
+        while not stop:
+            item = await self._queue.get()
+            if item is None:
+                stop = True
+            else:
+                self._encode(item)
+                # Give a burst a moment to accumulate so it lands in one write
+                await asyncio.sleep(self.flush_interval)
+                count = 1
+                while count < self.max_batch and len(self._buffer) < self.buffer_cap and not self._queue.empty():
+                    item = self._queue.get_nowait()
+                    if item is None:
+                        stop = True
+                        break
+                    self._encode(item)
+                    count += 1
+
+            if self._buffer:
+                # The thread gets the batch as its own buffer: a failed write's traceback can
+                # keep memoryviews of it alive, which would make the batch impossible to clear.
+                # Swapping also lets the old buffer's storage go, so a large burst does not pin memory.
+                batch, self._buffer = self._buffer, bytearray()
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                except Exception as e:
+                    logger.error(f"Dropping {len(batch)} bytes of payload log: {e}")
+
+        await asyncio.to_thread(self._sync_and_close)
+
+    def _write(self, data: bytearray):
+        if self._fd is None or self._file_bytes >= self.max_file_bytes:
+            if self._fd is not None:
+                os.close(self._fd)
+            path = self.directory / f"payloads_{time.time_ns()}.msgpack"
+            self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._file_bytes = 0
+        # The batch is already buffered here, so write straight to the descriptor
+        _write_all(self._fd, data)
+        self._file_bytes += len(data)
+
+    def _sync_and_close(self):
+        if self._fd is None:
+            return
+        os.fsync(self._fd)
+        os.close(self._fd)
+        self._fd = None
+
+# Global singleton instance
+payload_log = PayloadLog()
@@ -2,7 +2,11 @@ import asyncio
 from typing import Callable, Awaitable, Dict, Optional
 import logging
 
-logger = logging.getLogger(__name__)
+from core.logdir import LOG_DIR
+from core.logging_setup import attach_file_handler
+
+# Failed jobs are recorded in their own file rather than relying on a root logger configuration
+logger = attach_file_handler(logging.getLogger(__name__), LOG_DIR / "queue.log", '[%(asctime)s] %(levelname)s - %(message)s')
 
 class _WorkerState:
     def __init__(self):
@@ -13,14 +17,16 @@ class CoalescingQueue:
     """
     Per-key coalescing queue:
       - enqueue(key, job_factory): schedules a run for the key
-      - Multiple enqueues within debounce_window collapse into one run
+      - Enqueues less than quiet_window apart collapse into one run, which starts once
+        the key has been quiet for quiet_window (or debounce_window after the first signal)
       - If signals arrive while a run is executing, we run exactly once more
       - Worker exits after idle_timeout if no new signals
     """
-    def __init__(self, debounce_window: float = 0.8, idle_timeout: float = 5.0, max_concurrent_keys: int = 20):
+    def __init__(self, debounce_window: float = 0.8, idle_timeout: float = 5.0, max_concurrent_keys: int = 20, quiet_window: float = 0.15):
         self._states: Dict[str, _WorkerState] = {}
         self._lock = asyncio.Lock()
         self.debounce_window = debounce_window
+        self.quiet_window = quiet_window
         self.idle_timeout = idle_timeout
         # Limit concurrent keys overall to avoid global overload
         self._key_semaphore = asyncio.Semaphore(max_concurrent_keys)
@@ -36,6 +42,7 @@ class CoalescingQueue:
             state.signal.set()
 
     async def _run_worker(self, key: str, state: _WorkerState, job_factory: Callable[[], Awaitable[None]]):
+        loop = asyncio.get_running_loop()
         try:
             while True:
                 try:
@@ -45,10 +52,19 @@ class CoalescingQueue:
                     # No signals during idle period: stop the worker
                     break
 
-                # Debounce period to absorb bursts
-                await asyncio.sleep(self.debounce_window)
-                # Clear signal so we can detect any new arrivals during run
-                state.signal.clear()
+                # Debounce: wait until the burst goes quiet for quiet_window, but never
+                # past debounce_window, so a steady stream of signals still gets a run
+                deadline = loop.time() + self.debounce_window
+                while True:
+                    # Clear signal so we can detect any new arrivals during the wait and the run
+                    state.signal.clear()
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        await asyncio.wait_for(state.signal.wait(), timeout=min(self.quiet_window, remaining))
+                    except asyncio.TimeoutError:
+                        break
 
                 async with self._key_semaphore:
                     try:
@@ -1,11 +1,24 @@
+import asyncio
+from pathlib import Path
 from fastapi import FastAPI
+from core.logdir import LOG_DIR
+from core.orjson_response import ORJSONResponse
+from core.payload_log import payload_log
 from api.status_change import router as status_router
 from api.task_created import router as task_created_router 
 from api.subtask_created import router as subtask_created_router
 from api.custom_field_changed import router as custom_field_router
 from api.subtask_status_changed import router as subtask_status_changed_router
 
-app = FastAPI()
+# libuv-backed event loop when available; uvicorn's default loop="auto" also picks it up,
+# this covers other ASGI runners. Falls back to the stdlib loop if uvloop isn't installed.
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
+
+app = FastAPI(default_response_class=ORJSONResponse)
 
 app.include_router(status_router)
 app.include_router(task_created_router) 
@@ -13,3 +26,17 @@ app.include_router(subtask_created_router)
 app.include_router(custom_field_router)
 app.include_router(subtask_status_changed_router)
 
+@app.on_event("startup")
+async def _init_dirs():
+    # Every log/record directory the app writes to, created once per process
+    for directory in (LOG_DIR, Path("logs")):
+        directory.mkdir(parents=True, exist_ok=True)
+
+@app.on_event("shutdown")
+async def _shutdown():
+    try:
+        await payload_log.close()
+    finally:
+        # Imported here so app startup doesn't load the HTTP stack before it's needed
+        from services.clickup_client import client
+        await client.aclose()
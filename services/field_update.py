@@ -1,39 +1,54 @@
 import httpx
-import os
+import orjson
 import logging
 import asyncio
-from core.config import CLICKUP_API_TOKEN
+import itertools
+from cachetools import LRUCache, TTLCache
+from core.logdir import LOG_DIR
+from core.logging_setup import attach_file_handler
+from services.clickup_client import client
 from typing import List, Dict, Any, Optional, Tuple
 
-LOG_FILE = "webhook_logs/clickup_service.log"
-os.makedirs("webhook_logs", exist_ok=True)
+LOG_FILE = LOG_DIR / "clickup_service.log"
 
-logger = logging.getLogger(__name__)
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO, # Keep INFO level for file logging of key events
-    format='[%(asctime)s] %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+# Keep INFO level for file logging of key events
+logger = attach_file_handler(logging.getLogger(__name__), LOG_FILE, '[%(asctime)s] %(levelname)s - %(message)s')
 
 def log(msg: str, level: str = "info"):
     # Removed print statements for cleaner console output
     getattr(logger, level)(msg)
 
 CLICKUP_API_URL = "https://api.clickup.com/api/v2"
-HEADERS = {
-    "Authorization": str(CLICKUP_API_TOKEN) if CLICKUP_API_TOKEN else "",
-    "Content-Type": "application/json"
-}
+
+# Recent task reads keyed by (task_id, team_id), so repeat GETs within a job are served from
+# memory. Entries are dropped by invalidate() once a write or a failed verification makes them stale.
+_task_cache: "TTLCache[Tuple[str, str], Dict]" = TTLCache(maxsize=1024, ttl=2.0)
+# Stamp of each task's latest invalidate(), from one global counter so a stamp is never reused.
+# A GET that was in flight across an invalidate() must not cache its (possibly pre-write) result.
+# The TTL outlasts the client timeout, so no in-flight GET can see its stamp expire.
+_invalidations: "TTLCache[str, int]" = TTLCache(maxsize=4096, ttl=60.0)
+_invalidation_stamps = itertools.count(1)
+
+def invalidate(task_id: str):
+    """Forget cached reads of task_id for every team, including reads still in flight."""
+    _invalidations[task_id] = next(_invalidation_stamps)
+    for key in [key for key in _task_cache if key[0] == task_id]:
+        _task_cache.pop(key, None)
 
 async def get_task_details(task_id: str, team_id: str = "20420318") -> Optional[Dict]:
     """Get complete task details with team_id parameter"""
+    cached = _task_cache.get((task_id, team_id))
+    if cached is not None:
+        return cached
+    stamp = _invalidations.get(task_id, 0)
     url = f"{CLICKUP_API_URL}/task/{task_id}?team_id={team_id}"
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=HEADERS)
-            response.raise_for_status()
-            return response.json()
+        response = await client.get(url)
+        response.raise_for_status()
+        task_data = orjson.loads(response.content)
+        if _invalidations.get(task_id, 0) == stamp:
+            _task_cache[(task_id, team_id)] = task_data
+        return task_data
     except httpx.HTTPStatusError as e:
         log(f"HTTP error fetching task {task_id} - {e.response.status_code} {e.response.text}", "error")
     except Exception as e:
@@ -56,6 +71,13 @@ def format_field_value(value: Any, field_type: Optional[str] = None) -> Any:
         return value["id"]
     return value # For other types, or if dropdown value is already a string ID
 
+def _retry_after_seconds(response: httpx.Response, default: float = 1.0, cap: float = 30.0) -> float:
+    """Seconds to wait before retrying a 429, from the Retry-After header when it is usable."""
+    try:
+        return min(max(float(response.headers.get("Retry-After", default)), 0.0), cap)
+    except ValueError:
+        return default
+
 async def update_single_field(task_id: str, field_id: str, value: Any, field_type: str = "", team_id: str = "20420318") -> bool:
     """Enhanced field updater with direct value handling."""
     url = f"{CLICKUP_API_URL}/task/{task_id}/field/{field_id}?team_id={team_id}"
@@ -65,15 +87,21 @@ async def update_single_field(task_id: str, field_id: str, value: Any, field_typ
     payload = {"value": format_field_value(value, field_type)}
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, headers=HEADERS, json=payload)
+        response = await client.post(url, json=payload)
+        if response.status_code == 429:
+            # Rate limited: wait as long as ClickUp asks, then try once more
+            delay = _retry_after_seconds(response)
+            log(f"Rate limited updating field {field_id}; retrying in {delay:.1f}s", "warning")
+            await asyncio.sleep(delay)
+            response = await client.post(url, json=payload)
             
-            if response.status_code == 200:
-                log(f"Successfully updated field {field_id} (Type: {field_type}) with value: {payload['value']}", "info") # Changed from debug to info
-                return True
+        if response.status_code == 200:
+            invalidate(task_id)
+            log(f"Successfully updated field {field_id} (Type: {field_type}) with value: {payload['value']}", "info") # Changed from debug to info
+            return True
             
-            log(f"Failed to update field {field_id} (Type: {field_type}) with value: {payload['value']}. Status: {response.status_code} - Response: {response.text}", "warning")
-            return False
+        log(f"Failed to update field {field_id} (Type: {field_type}) with value: {payload['value']}. Status: {response.status_code} - Response: {response.text}", "warning")
+        return False
             
     except Exception as e:
         log(f"Error updating field {field_id}: {str(e)}", "error")
@@ -85,22 +113,24 @@ async def update_task_fields(task_id: str, fields: List[Dict], team_id: str = "2
         log("No fields to update", "info")
         return True
 
-    results = []
-    for field in fields:
-        success = await update_single_field(
-            task_id=task_id,
-            field_id=field["id"],
-            value=field["value"],
-            field_type=field.get("type") or "",
-            team_id=team_id
-        )
-        results.append(success)
-        
-        # Small delay between updates to avoid rate limiting
-        if len(fields) > 1:
-            await asyncio.sleep(0.5)
+    sem = asyncio.Semaphore(6)  # limit concurrency to avoid rate limits
+
+    async def update_one(field: Dict) -> bool:
+        async with sem:
+            return await update_single_field(
+                task_id=task_id,
+                field_id=field["id"],
+                value=field["value"],
+                field_type=field.get("type") or "",
+                team_id=team_id
+            )
+
+    results = await asyncio.gather(*(update_one(field) for field in fields), return_exceptions=True)
+    for field, result in zip(fields, results):
+        if isinstance(result, Exception):
+            log(f"Error updating field {field['id']}: {result}", "error")
     
-    return all(results)
+    return all(result is True for result in results)
 
 async def verify_field_updates(task_id: str, expected_fields: List[Dict], team_id: str = "20420318", return_failed: bool = False) -> Tuple[bool, List[Dict]]:
     """Enhanced verification with robust dropdown value resolution, optionally returning failed fields."""
@@ -108,8 +138,40 @@ async def verify_field_updates(task_id: str, expected_fields: List[Dict], team_i
     if not task_data:
         log(f"Could not fetch task {task_id} for verification.", "error")
         return False, expected_fields if return_failed else []
-    
-    current_fields_map = {f["id"]: f for f in task_data.get("custom_fields", [])}
+    verified, failed = verify_fields_in_task(task_data, expected_fields, return_failed)
+    if not verified:
+        # The read may predate the write; a retried verification must fetch again
+        invalidate(task_id)
+    return verified, failed
+
+# Dropdown option lookups per field_id. Dropdown schemas are shared by every task using
+# the field, so the lookups are built once and reused while the options are unchanged.
+_options_cache: "LRUCache[str, Dict[str, Any]]" = LRUCache(maxsize=256)
+
+def option_indexes(field_id: str, options: List[Dict]) -> Dict[str, Any]:
+    """by_order / by_id / by_name lookups from a dropdown's options to the option id."""
+    fingerprint = tuple((opt.get("id"), opt.get("orderindex"), opt.get("name")) for opt in options)
+    cached = _options_cache.get(field_id)
+    if cached is not None and cached["fingerprint"] == fingerprint:
+        return cached
+    # Built from the reversed list so the first matching option wins, as a linear scan would
+    indexes = {
+        "fingerprint": fingerprint,
+        "by_order": {order: opt_id for opt_id, order, _ in reversed(fingerprint)},
+        "by_id": {str(opt_id): opt_id for opt_id, _, _ in reversed(fingerprint)},
+        "by_name": {name: opt_id for opt_id, _, name in reversed(fingerprint)},
+    }
+    # A changed option list replaces the stale entry
+    _options_cache[field_id] = indexes
+    return indexes
+
+def verify_fields_in_task(task_data: Dict, expected_fields: List[Dict], return_failed: bool = False) -> Tuple[bool, List[Dict]]:
+    """
+    Match expected field values against an already-fetched task payload (no request).
+    Without return_failed, stops at the first mismatch; with it, checks every field.
+    """
+    # Built once per payload so each expected field is a direct lookup
+    current_fields_map = {f["id"]: f for f in task_data.get("custom_fields", []) if "id" in f}
     all_success = True
     failed_fields_list = []
     
@@ -124,8 +186,9 @@ async def verify_field_updates(task_id: str, expected_fields: List[Dict], team_i
         if not current_field:
             log(f"Field {field_name} ({field_id}) not found in task after update.", "warning")
             all_success = False
-            if return_failed:
-                failed_fields_list.append(expected_field)
+            if not return_failed:
+                return False, []  # Only the verdict was asked for; it can't change now
+            failed_fields_list.append(expected_field)
             continue
         
         current_value_raw = current_field.get("value")
@@ -141,26 +204,17 @@ async def verify_field_updates(task_id: str, expected_fields: List[Dict], team_i
             if isinstance(current_value_raw, dict) and "id" in current_value_raw:
                 current_option_id = current_value_raw["id"]
             elif isinstance(current_value_raw, int): # It's an orderindex
-                for opt in current_field_options:
-                    if opt.get("orderindex") == current_value_raw:
-                        current_option_id = opt.get("id")
-                        break
+                current_option_id = option_indexes(field_id, current_field_options)["by_order"].get(current_value_raw)
             elif isinstance(current_value_raw, str): # It could be the ID or the name
-                for opt in current_field_options:
-                    if str(opt.get("id")) == current_value_raw:
-                        current_option_id = opt.get("id")
-                        break
-                if not current_option_id:
-                    for opt in current_field_options:
-                        if opt.get("name") == current_value_raw:
-                            current_option_id = opt.get("id")
-                            break
+                indexes = option_indexes(field_id, current_field_options)
+                current_option_id = indexes["by_id"].get(current_value_raw) or indexes["by_name"].get(current_value_raw)
             
             if str(expected_value_for_update) != str(current_option_id):
                 log(f"Field {field_name} verification failed. Expected ID: '{expected_value_for_update}', Got resolved ID: '{current_option_id}' (Raw from ClickUp: {current_value_raw})", "warning")
                 all_success = False
-                if return_failed:
-                    failed_fields_list.append(expected_field)
+                if not return_failed:
+                    return False, []
+                failed_fields_list.append(expected_field)
             else:
                 log(f"Field {field_name} verified successfully. Value ID: '{current_option_id}'", "info")
 
@@ -171,8 +225,9 @@ async def verify_field_updates(task_id: str, expected_fields: List[Dict], team_i
             if expected_value_formatted != current_value_formatted:
                 log(f"Field {field_name} verification failed. Expected: '{expected_value_formatted}', Got: '{current_value_formatted}' (Raw: {current_value_raw})", "warning")
                 all_success = False
-                if return_failed:
-                    failed_fields_list.append(expected_field)
+                if not return_failed:
+                    return False, []
+                failed_fields_list.append(expected_field)
             else:
                 log(f"Field {field_name} verified successfully. Value: '{current_value_formatted}'", "info")
     
@@ -186,6 +241,7 @@ async def log_current_field_states(task_id: str, field_ids: List[str], team_id:
         return
     
     log(f"Current field states for task {task_id}:", "info")
+    wanted = set(field_ids)
     for field in task_data.get("custom_fields", []):
-        if field.get("id") in field_ids:
+        if field.get("id") in wanted:
             log(f"  - {field.get('name')} ({field.get('id')}): {field.get('value')} (Type: {field.get('type')})", "info")